@@ -1,24 +1,51 @@
 """State management for Salesforce authentication flow."""
-from enum import Enum
-from dataclasses import dataclass
+import time
+from enum import IntEnum
 from typing import Optional
 
-class AuthState(Enum):
-    INITIAL = "initial"
-    SANDBOX_LOGIN = "sandbox_login"
-    WAITING_FOR_CONFIG = "waiting_for_config"
-    OAUTH_FLOW = "oauth_flow"
-    COMPLETED = "completed"
-    ERROR = "error"
+# Treat tokens as expired slightly early to absorb clock skew and in-flight time.
+TOKEN_EXPIRY_SKEW_SECONDS = 30
+
+class AuthState(IntEnum):
+    """Authentication flow states; IntEnum so comparisons are raw int compares."""
+    INITIAL = 0
+    SANDBOX_LOGIN = 1
+    WAITING_FOR_CONFIG = 2
+    OAUTH_FLOW = 3
+    COMPLETED = 4
+    ERROR = 5
 
-@dataclass
 class AuthContext:
-    """Holds the current state and data for the authentication flow."""
-    state: AuthState = AuthState.INITIAL
-    environment: str = "sandbox"
-    instance_url: Optional[str] = None
-    error_message: Optional[str] = None
-    
+    """Holds the current state and data for the authentication flow.
+
+    Uses __slots__ so each instance skips the per-object __dict__ and
+    attribute access resolves through C-level descriptors. (A slotted
+    dataclass would need Python 3.10+; this package supports 3.9.)
+    """
+    __slots__ = ('state', 'environment', 'instance_url', 'error_message',
+                 'access_token', 'refresh_token', 'expires_at')
+
+    def __init__(self,
+                 state: AuthState = AuthState.INITIAL,
+                 environment: str = "sandbox",
+                 instance_url: Optional[str] = None,
+                 error_message: Optional[str] = None,
+                 access_token: Optional[str] = None,
+                 refresh_token: Optional[str] = None,
+                 expires_at: float = 0.0):
+        self.state = state
+        self.environment = environment
+        self.instance_url = instance_url
+        self.error_message = error_message
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+
+    @property
+    def is_expired(self) -> bool:
+        """Fast in-memory expiry check, avoiding a round-trip to Salesforce."""
+        return time.time() >= self.expires_at - TOKEN_EXPIRY_SKEW_SECONDS
+
     def update_state(self, new_state: AuthState, error: Optional[str] = None):
         """Update the current state and optionally set an error message."""
         self.state = new_state
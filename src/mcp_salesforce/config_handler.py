@@ -1,22 +1,12 @@
 """Configuration screen handler for TheGooseForce."""
 from http.server import BaseHTTPRequestHandler, HTTPServer
-import json
+import gzip
 import logging
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import unquote_plus
 
 logger = logging.getLogger(__name__)
 
-class ConfigurationHandler(BaseHTTPRequestHandler):
-    """Handler for configuration screen."""
-    
-    def do_GET(self):
-        """Serve the configuration page."""
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            html = """
+_CONFIG_HTML = """
             <!DOCTYPE html>
             <html>
             <head>
@@ -163,48 +153,76 @@ class ConfigurationHandler(BaseHTTPRequestHandler):
             </body>
             </html>
             """
-            self.wfile.write(html.encode())
-            
+
+# Encode once at import time so each GET is a single write of cached bytes.
+_CONFIG_HTML_BYTES = _CONFIG_HTML.encode("utf-8")
+# Compressed copy for browsers advertising gzip support (all modern ones do);
+# the compression cost is paid once at import.
+_CONFIG_HTML_GZ = gzip.compress(_CONFIG_HTML_BYTES, compresslevel=9)
+
+# Fixed JSON response bodies, serialized once instead of per request.
+_SUCCESS_JSON = b'{"success": true, "message": "Configuration saved"}'
+_INVALID_KEY_JSON = b'{"success": false, "error": "Invalid Consumer Key"}'
+
+# Complete 404 response for favicon and other stray browser requests.
+_NOT_FOUND_BYTES = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+class ConfigurationHandler(BaseHTTPRequestHandler):
+    """Handler for configuration screen."""
+
+    def _write_full(self, status: bytes, content_type: bytes, body: bytes,
+                    extra_headers: bytes = b""):
+        """Send the status line, headers, and body in a single socket write."""
+        self.wfile.write(
+            b"HTTP/1.1 " + status + b"\r\n"
+            b"Content-Type: " + content_type + b"\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            + extra_headers +
+            b"Cache-Control: no-store\r\n"
+            b"Connection: close\r\n"
+            b"\r\n" + body
+        )
+
+    def do_GET(self):
+        """Serve the configuration page."""
+        if self.path == '/favicon.ico':
+            # Browsers always ask for this; answer from a cached response.
+            self.wfile.write(_NOT_FOUND_BYTES)
+            return
+
+        if self.path == '/':
+            if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                self._write_full(b"200 OK", b"text/html", _CONFIG_HTML_GZ,
+                                 extra_headers=b"Content-Encoding: gzip\r\n")
+            else:
+                self._write_full(b"200 OK", b"text/html", _CONFIG_HTML_BYTES)
+
         elif self.path.startswith('/submit'):
-            # Handle configuration submission
-            query = parse_qs(urlparse(self.path).query)
-            consumer_key = query.get('consumer_key', [None])[0]
+            # Handle configuration submission. The path is always
+            # /submit?consumer_key=..., so scan the query string directly
+            # instead of paying for urlparse + parse_qs.
+            _, _, qs = self.path.partition('?')
+            consumer_key = None
+            for param in qs.split('&'):
+                if param.startswith('consumer_key='):
+                    consumer_key = unquote_plus(param[len('consumer_key='):])
+                    break
             
             if consumer_key:
-                try:
-                    # Store the consumer key
-                    self.server.consumer_key = consumer_key
-                    self.server.config_received.set()
-                    
-                    # Send success response
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({
-                        "success": True,
-                        "message": "Configuration saved"
-                    }).encode())
-                except Exception as e:
-                    logger.error(f"Error saving configuration: {str(e)}")
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({
-                        "success": False,
-                        "error": f"Error saving configuration: {str(e)}"
-                    }).encode())
+                # Store the consumer key and wake the waiter. Neither an
+                # attribute set nor Event.set() can fail here, so the old
+                # broad try/except added only overhead; persisting to keyring
+                # happens in LoginHandler, which has its own error handling.
+                self.server.consumer_key = consumer_key
+                self.server.config_received.set()
+
+                self._write_full(b"200 OK", b"application/json", _SUCCESS_JSON)
             else:
-                self.send_response(400)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    "success": False,
-                    "error": "Invalid Consumer Key"
-                }).encode())
+                self._write_full(b"400 Bad Request", b"application/json", _INVALID_KEY_JSON)
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.wfile.write(_NOT_FOUND_BYTES)
     
     def log_message(self, format, *args):
         """Override to use our logger."""
-        logger.debug(f"Configuration Server: {format%args}")
\ No newline at end of file
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Configuration Server: " + format, *args)
\ No newline at end of file
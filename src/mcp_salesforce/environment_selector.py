@@ -1,11 +1,13 @@
 """Environment selector for TheGooseForce."""
+import asyncio
+import atexit
 import logging
 import webbrowser
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
-import socket
+import gzip
 import json
-import urllib.parse
+import re
 from typing import Optional, Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -132,118 +134,199 @@ HTML_TEMPLATE = """
 </html>
 """
 
-class SelectorHandler(SimpleHTTPRequestHandler):
+# Encode once at import time so each GET is a single write of cached bytes.
+_HTML_TEMPLATE_BYTES = HTML_TEMPLATE.encode("utf-8")
+# Compressed copy for browsers advertising gzip support (all modern ones do);
+# the compression cost is paid once at import.
+_HTML_TEMPLATE_GZ = gzip.compress(_HTML_TEMPLATE_BYTES, compresslevel=9)
+
+# Fixed JSON response bodies, serialized once instead of per request.
+_OK_JSON = b'{"status": "ok"}'
+_NO_ENV_JSON = b'{"status": "error", "message": "No environment specified"}'
+
+# Complete 404 response for favicon and other stray browser requests.
+_NOT_FOUND_BYTES = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+# The selector only ever sends these three literal values.
+_SELECT_RE = re.compile(r'^/select\?env=(production|sandbox|cancel)$')
+
+class SelectorServer(ThreadingHTTPServer):
+    """Threaded selector server so parallel browser requests don't serialize."""
+    allow_reuse_address = True
+    daemon_threads = True
+
+class SelectorHandler(BaseHTTPRequestHandler):
+    # Set TCP_NODELAY on accepted sockets so the JSON reply isn't delayed by Nagle.
+    disable_nagle_algorithm = True
+
+    def _write_full(self, status: bytes, content_type: bytes, body: bytes,
+                    extra_headers: bytes = b""):
+        """Send the status line, headers, and body in a single socket write."""
+        self.wfile.write(
+            b"HTTP/1.1 " + status + b"\r\n"
+            b"Content-Type: " + content_type + b"\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            + extra_headers +
+            b"Cache-Control: no-store, no-cache, must-revalidate\r\n"
+            b"Connection: close\r\n"
+            b"\r\n" + body
+        )
+
     def do_GET(self):
         try:
+            if self.path == '/favicon.ico':
+                # Browsers always ask for this; answer from a cached response.
+                self.wfile.write(_NOT_FOUND_BYTES)
+                return
+
             if self.path == '/':
                 # Serve selector page
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
-                self.end_headers()
-                self.wfile.write(HTML_TEMPLATE.encode())
-                
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    self._write_full(b"200 OK", b"text/html", _HTML_TEMPLATE_GZ,
+                                     extra_headers=b"Content-Encoding: gzip\r\n")
+                else:
+                    self._write_full(b"200 OK", b"text/html", _HTML_TEMPLATE_BYTES)
+
             elif self.path.startswith('/select'):
-                # Handle environment selection
-                query = urllib.parse.urlparse(self.path).query
-                params = urllib.parse.parse_qs(query)
-                
-                if 'env' in params:
-                    environment = params['env'][0]
+                # Handle environment selection. Only the three literal env
+                # values are accepted, so one precompiled regex match both
+                # parses and validates; anything else falls through to the
+                # error branch.
+                m = _SELECT_RE.match(self.path)
+
+                if m:
+                    environment = m.group(1)
                     self.server.selected_environment = environment
                     self.server.selection_event.set()
-                    
+                    # Wake an async waiter (show_async) without a thread wakeup.
+                    if self.server.async_loop is not None:
+                        self.server.async_loop.call_soon_threadsafe(
+                            self.server.async_event.set)
+
                     # Return success
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({"status": "ok"}).encode())
+                    self._write_full(b"200 OK", b"application/json", _OK_JSON)
                 else:
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({
-                        "status": "error",
-                        "message": "No environment specified"
-                    }).encode())
+                    self._write_full(b"400 Bad Request", b"application/json", _NO_ENV_JSON)
             else:
-                self.send_response(404)
-                self.end_headers()
-                
+                self.wfile.write(_NOT_FOUND_BYTES)
+
         except Exception as e:
-            logger.error(f"Error handling request: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            logger.error("Error handling request: %s", e)
+            body = json.dumps({
                 "status": "error",
                 "message": str(e)
-            }).encode())
+            }).encode()
+            self._write_full(b"500 Internal Server Error", b"application/json", body)
     
     def log_message(self, format, *args):
         """Override to use our logger."""
-        logger.debug(f"Selector: {format%args}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Selector: " + format, *args)
 
 class EnvironmentSelector:
+    # One long-lived server shared by all selector instances: binding, listening,
+    # and thread startup are paid once per process instead of per login round.
+    _shared_server = None
+    _shared_thread = None
+    _server_lock = threading.Lock()
+
     def __init__(self):
         self.server = None
         self.thread = None
-        
-    def _find_available_port(self, start_port: int = 8787, max_attempts: int = 10) -> int:
-        """Find an available port starting from start_port."""
-        for port in range(start_port, start_port + max_attempts):
+
+    @classmethod
+    def _ensure_server(cls):
+        """Create and start the shared server on first use; reuse it afterwards.
+
+        Binds to port 0 and lets the kernel pick a free ephemeral port,
+        avoiding the probe-then-rebind race of scanning for an open port.
+        """
+        with cls._server_lock:
+            if cls._shared_server is None:
+                server = SelectorServer(('127.0.0.1', 0), SelectorHandler)
+                server.selected_environment = None
+                server.selection_event = threading.Event()
+                server.async_loop = None
+                server.async_event = None
+                thread = threading.Thread(target=server.serve_forever)
+                thread.daemon = True
+                thread.start()
+                cls._shared_server = server
+                cls._shared_thread = thread
+                atexit.register(cls.close)
+            return cls._shared_server
+
+    @classmethod
+    def close(cls):
+        """Shut down the shared server; registered to run at process exit."""
+        with cls._server_lock:
+            if cls._shared_server is not None:
+                logger.info("Shutting down environment selector server...")
+                cls._shared_server.shutdown()
+                cls._shared_server.server_close()
+                cls._shared_server = None
+                cls._shared_thread = None
+                logger.info("Server shutdown complete")
+
+    def _launch(self, async_loop=None) -> None:
+        """Reset per-round state on the shared server and open the browser."""
+        self.server = self._ensure_server()
+        self.thread = self._shared_thread
+        self.server.selected_environment = None
+        self.server.selection_event.clear()
+        self.server.async_loop = async_loop
+        self.server.async_event = asyncio.Event() if async_loop else None
+
+        # Launch the browser from a daemon thread: webbrowser can block for
+        # hundreds of ms while the browser starts, and the selection wait can
+        # begin in parallel. autoraise=False skips a window-manager round-trip.
+        port = self.server.server_address[1]
+        url = f"http://127.0.0.1:{port}"
+        logger.info("Opening environment selector: %s", url)
+        threading.Thread(target=webbrowser.open, args=(url,),
+                         kwargs={'new': 2, 'autoraise': False},
+                         daemon=True).start()
+        logger.info("Waiting for environment selection...")
+
+    def _selection_result(self) -> Optional[Dict[str, Any]]:
+        """Translate the recorded selection into the show() return value."""
+        if self.server.selected_environment == 'cancel':
+            logger.info("Selection cancelled by user")
+            return None
+
+        if self.server.selected_environment:
+            logger.info("Environment selected: %s", self.server.selected_environment)
+            return {"environment": self.server.selected_environment}
+
+        logger.info("No environment selected or timeout")
+        return None
+
+    async def show_async(self) -> Optional[Dict[str, Any]]:
+        """Show the selector without blocking the running event loop.
+
+        The handler thread signals an asyncio.Event via call_soon_threadsafe,
+        so the wait is integrated with the event loop instead of parking a
+        thread on Event.wait; other MCP tool calls proceed while the user
+        picks an environment in the browser.
+        """
+        try:
+            self._launch(async_loop=asyncio.get_running_loop())
             try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind(('127.0.0.1', port))
-                    return port
-            except OSError:
-                continue
-        raise RuntimeError("Could not find an available port")
-    
+                await asyncio.wait_for(self.server.async_event.wait(), timeout=60)
+            except asyncio.TimeoutError:
+                pass
+            return self._selection_result()
+        except Exception as e:
+            logger.error("Environment selection failed: %s", e)
+            return None
+
     def show(self) -> Optional[Dict[str, Any]]:
         """Show the environment selector and return the selected environment."""
         try:
-            # Find available port
-            port = self._find_available_port()
-            
-            # Create server with selection event
-            self.server = HTTPServer(('127.0.0.1', port), SelectorHandler)
-            self.server.selected_environment = None
-            self.server.selection_event = threading.Event()
-            
-            # Start server in thread
-            self.thread = threading.Thread(target=self.server.serve_forever)
-            self.thread.daemon = True
-            self.thread.start()
-            
-            # Open browser
-            url = f"http://127.0.0.1:{port}"
-            logger.info(f"Opening environment selector: {url}")
-            webbrowser.open(url)
-            
-            # Wait for selection
-            logger.info("Waiting for environment selection...")
-            if self.server.selection_event.wait(timeout=60):  # Wait up to 60 seconds
-                if self.server.selected_environment == 'cancel':
-                    logger.info("Selection cancelled by user")
-                    return None
-                    
-                if self.server.selected_environment:
-                    logger.info(f"Environment selected: {self.server.selected_environment}")
-                    return {"environment": self.server.selected_environment}
-            
-            logger.info("No environment selected or timeout")
-            return None
-            
+            self._launch()
+            # Wait for selection (up to 60 seconds)
+            self.server.selection_event.wait(timeout=60)
+            return self._selection_result()
         except Exception as e:
-            logger.error(f"Environment selection failed: {e}")
-            return None
-        finally:
-            # Cleanup
-            if self.server:
-                logger.info("Shutting down environment selector server...")
-                self.server.shutdown()
-                self.server.server_close()
-                logger.info("Server shutdown complete")
\ No newline at end of file
+            logger.error("Environment selection failed: %s", e)
+            return None
\ No newline at end of file
@@ -1,109 +1,291 @@
 """Login handler for MCP Salesforce."""
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import base64
+import collections
+from contextlib import contextmanager
+import hashlib
+import hmac
 import json
 import logging
+import concurrent.futures
 import secrets
-import webbrowser
+import struct
 import threading
 import time
-from typing import Optional, Dict, Any
-from urllib.parse import urlencode, parse_qs, urlparse, unquote
-import keyring
-from simple_salesforce import Salesforce
+from typing import Optional, Dict, Any, TYPE_CHECKING
+from urllib.parse import urlencode, parse_qsl, quote, urlparse
 from .config_handler import ConfigurationHandler
 from .auth_state import AuthState, AuthContext
 
-# Set up logging
-logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
+# keyring, webbrowser, requests, and simple_salesforce are imported lazily at
+# first use: together they add hundreds of ms and tens of MB to process start,
+# and a session that only runs logout or reuses a cached client never needs
+# some of them. Repeat imports are served from sys.modules.
+if TYPE_CHECKING:
+    from simple_salesforce import Salesforce
 
-# Add console handler if it doesn't exist
-if not logger.handlers:
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
+# Level and handlers are governed by the root configuration in
+# run_mcp_server (MCP_SF_LOG_LEVEL, queue handler); pinning either here
+# would both double-emit records and make DEBUG impossible to enable.
+logger = logging.getLogger(__name__)
 
 CONFIG_SERVICE_NAME = "goose_salesforce"
 CONFIG_KEY_NAME = "consumer_key"
+TOKEN_KEY_NAME = "sf_access_token"
+
+# Salesforce does not report a lifetime for user-agent flow tokens; assume the
+# default two-hour session timeout and refresh/re-login past that.
+TOKEN_LIFETIME = 2 * 60 * 60
+
+# Pinned REST API version; passing it explicitly keeps every client on a
+# known version instead of whatever the installed simple_salesforce defaults.
+SF_API_VERSION = "59.0"
+
+# How long a keyring read stays fresh in memory. Keychain IPC can cost tens of
+# milliseconds per hit, so steady-state logins should be served from memory.
+CONFIG_CACHE_TTL = 300
+
+# HMAC-signed state token layout: 12-byte nonce + 8-byte big-endian issue
+# time, followed by a truncated SHA-256 tag.
+_STATE_NONCE_LEN = 12
+_STATE_PAYLOAD_LEN = _STATE_NONCE_LEN + 8
+_STATE_SIG_LEN = 16
+# Upper bound on remembered consumed nonces; oldest are evicted first.
+_MAX_USED_NONCES = 1024
+
+# Environment-dependent but process-static OAuth endpoints and the request
+# parameters that never vary between logins; built once at import.
+_BASE_URLS = {
+    'sandbox': 'https://test.salesforce.com',
+    'production': 'https://login.salesforce.com',
+}
+_STATIC_PARAMS = {
+    'response_type': 'token',
+    'scope': 'api full refresh_token',
+    'prompt': 'login consent select_account',
+    'display': 'page',
+}
+# The same four parameters percent-encoded once; per-login URL building is
+# then plain string concatenation of the three varying fields.
+_STATIC_QUERY = urlencode(_STATIC_PARAMS)
+
+# One-line bounce page: URL fragments never reach the server, so the first
+# response replays the fragment as a query string via location.replace. The
+# browser immediately re-requests with the token as ?access_token=..., with
+# no fetch promise chain and no large HTML payload. The hash guard stops a
+# fragment-less visit (hand-typed URL, post-auth revisit) from redirecting
+# to itself in a reload loop; such visitors just see the fallback text.
+_CALLBACK_HTML_BYTES = (
+    b"<script>if(location.hash)location.replace('/?'+location.hash.substring(1))"
+    b"</script>No authentication data to process. You can close this window."
+)
+_SUCCESS_BYTES = b"Authentication successful! You can close this window."
+
+def _err(msg: str) -> Dict[str, Any]:
+    """Build the standard failure payload returned by the login APIs."""
+    return {"success": False, "error": msg}
+
+# Success payload template; returned as dict(_OK) so callers can't mutate it.
+_OK = {"success": True, "message": "Successfully authenticated with Salesforce"}
+
+@contextmanager
+def _temp_http_server(port: int, handler, **attrs):
+    """Run a one-shot localhost HTTP server on a daemon thread.
+
+    Keyword arguments become attributes on the server before the serving
+    thread starts, so a handler can never observe a half-initialized
+    server. Guarantees exactly one shutdown()/server_close() on exit,
+    whatever path leaves the block.
+    """
+    server = ThreadingHTTPServer(('localhost', port), handler)
+    for name, value in attrs.items():
+        setattr(server, name, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def _http_response(body: bytes) -> bytes:
+    """Pre-serialize a complete 200 response (status, headers, body)."""
+    return (b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/html\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: close\r\n"
+            b"\r\n" + body)
+
+# Both callback responses are fully static, so each request is answered with
+# a single write of cached bytes instead of send_response/send_header calls.
+_BOUNCE_RESPONSE = _http_response(_CALLBACK_HTML_BYTES)
+_SUCCESS_RESPONSE = _http_response(_SUCCESS_BYTES)
+
+class CallbackServer(ThreadingHTTPServer):
+    """OAuth callback server, kept alive across login attempts.
+
+    Threaded so the bounce request and the browser's follow-up (plus any
+    stray favicon fetch) don't serialize behind one another.
+    allow_reuse_address means a process restart or quick retry never dies
+    on EADDRINUSE from a lingering TIME_WAIT socket on port 8787.
+    """
+    allow_reuse_address = True
 
 class OAuthCallbackHandler(BaseHTTPRequestHandler):
     """Handler for OAuth callback."""
+
     def do_GET(self):
         try:
-            logger.debug(f"OAuth callback received: {self.path}")
-            if '#' in self.path:
-                # If we somehow get the fragment directly, use it
-                full_url = f"http://localhost:{self.server.server_port}{self.path}"
-                self.server.callback_url = full_url
+            # Path only up to the query: the bounced request carries the
+            # access token as ?access_token=..., which must stay out of logs
+            logger.debug("OAuth callback received: %s", self.path.split('?', 1)[0])
+            query = dict(parse_qsl(urlparse(self.path).query, keep_blank_values=True))
+            if query:
+                # Bounced request: the fragment came back as the query string,
+                # already parsed - no URL reconstruction or re-parsing needed.
+                self.server.callback_params = query
                 self.server.callback_received.set()
-                logger.debug("Received direct fragment")
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(b"Authentication successful! You can close this window.")
+                logger.debug("Received OAuth parameters via bounced query string")
+                self.wfile.write(_SUCCESS_RESPONSE)
             else:
-                # Check if this is a callback with the hash parameter
-                query = parse_qs(urlparse(self.path).query)
-                if 'hash' in query:
-                    # We got the fragment data back from the JavaScript
-                    fragment = query['hash'][0]
-                    full_url = f"http://localhost:{self.server.server_port}/#{fragment}"
-                    self.server.callback_url = full_url
-                    self.server.callback_received.set()
-                    logger.debug("Received hash fragment via query parameter")
-                    
-                    self.send_response(200)
-                    self.send_header('Content-type', 'text/html')
-                    self.end_headers()
-                    self.wfile.write(b"Authentication successful! You can close this window.")
-                else:
-                    # First request - serve the HTML that will capture and send back the fragment
-                    logger.debug("Serving OAuth callback HTML")
-                    self.send_response(200)
-                    self.send_header('Content-type', 'text/html')
-                    self.end_headers()
-                    html = """
-                    <html><body>
-                    <script>
-                        // Get the hash fragment and send it back
-                        var hash = window.location.hash;
-                        if (hash) {
-                            // Remove the leading # before sending
-                            var fragment = hash.substring(1);
-                            // Send the hash fragment back to the server
-                            fetch('/?hash=' + encodeURIComponent(fragment))
-                                .then(() => {
-                                    document.write("Authentication successful! You can close this window.");
-                                });
-                        }
-                    </script>
-                    <p>Processing authentication response...</p>
-                    </body></html>
-                    """
-                    self.wfile.write(html.encode())
-                    
+                # First request - serve the one-line bounce page that replays
+                # the fragment as a query string
+                logger.debug("Serving OAuth callback bounce page")
+                self.wfile.write(_BOUNCE_RESPONSE)
+
         except Exception as e:
-            logger.error(f"Error in OAuth callback: {str(e)}", exc_info=True)
+            logger.error("Error in OAuth callback: %s", e, exc_info=True)
             self.send_response(500)
             self.end_headers()
 
+    def log_message(self, format, *args):
+        """Override the default stderr access log so response handling is
+        never stalled on console I/O; do_GET already logs at DEBUG."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("OAuth callback server: " + format, *args)
+
 class LoginHandler:
     def __init__(self):
         logger.debug("Initializing LoginHandler")
         self.sf = None
-        self._states = {}  # Dictionary to store multiple states with timestamps
+        # State tokens are self-validating (HMAC-signed with this per-process
+        # secret); only consumed nonces are remembered, to block replays.
+        self._state_secret = secrets.token_bytes(32)
+        self._used_nonces = collections.OrderedDict()
         self._server = None
         self._server_thread = None
         self.client_id = None
         self.callback_url = "http://localhost:8787"
         self.auth_context = AuthContext()
         self._cleanup_interval = 300  # 5 minutes in seconds
+        # In-memory consumer-key cache; guarded by a lock because the
+        # configuration server delivers the key from a background thread.
+        self._consumer_key_cache = None
+        self._consumer_key_cache_ts = 0.0
+        self._config_lock = threading.Lock()
+        # Single-flight guard: concurrent login attempts share one in-progress
+        # flow instead of racing for port 8787 and double-opening browsers.
+        self._login_lock = threading.Lock()
+        self._login_future: Optional[concurrent.futures.Future] = None
+        # Resolved lazily: keyring.get_password re-probes the backend priority
+        # list on every module-level call, so hold one backend handle instead.
+        self._keyring_backend = None
+
+    def invalidate_config(self) -> None:
+        """Drop the in-memory consumer key so the next login re-reads keyring.
+
+        The key is org configuration, not session data, so clear_session
+        leaves it cached; call this after changing the Connected App.
+        """
+        with self._config_lock:
+            self._consumer_key_cache = None
+            self._consumer_key_cache_ts = 0.0
+
+    def _keyring(self):
+        """Resolve the active keyring backend once and reuse it."""
+        if self._keyring_backend is None:
+            import keyring
+            self._keyring_backend = keyring.get_keyring()
+        return self._keyring_backend
+
+    async def start_login_flow_async(self, environment: Optional[str] = None) -> Dict[str, Any]:
+        """Run the login flow without blocking the running event loop.
+
+        The flow blocks on the OAuth callback for up to five minutes; under
+        the MCP server that wait must happen on a worker thread or every
+        other tool call in the process stalls behind it.
+        """
+        return await asyncio.to_thread(self.start_login_flow, environment)
+
+    async def handle_oauth_callback_async(self, callback_url: str) -> Dict[str, Any]:
+        """Process an OAuth callback URL off the event loop."""
+        return await asyncio.to_thread(self.handle_oauth_callback, callback_url)
 
     def start_login_flow(self, environment: Optional[str] = None) -> Dict[str, Any]:
-        """Start the sequential login flow."""
+        """Start the sequential login flow, coalescing concurrent attempts.
+
+        If another login is already in progress, wait for and return its
+        result rather than starting a second callback server and browser.
+        """
+        with self._login_lock:
+            in_progress = self._login_future
+            if in_progress is not None and not in_progress.done():
+                logger.debug("Login already in progress, waiting for its result")
+            else:
+                in_progress = None
+                self._login_future = concurrent.futures.Future()
+
+        if in_progress is not None:
+            return in_progress.result()
+
+        future = self._login_future
+        try:
+            result = self._run_login_flow(environment)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            # _run_login_flow catches its own errors; this only guards against
+            # surprises so concurrent waiters are never left hanging.
+            future.set_exception(e)
+            raise
+        finally:
+            with self._login_lock:
+                self._login_future = None
+
+    @staticmethod
+    def _build_sf_client(instance_url: str, session_id: str) -> "Salesforce":
+        """Create a Salesforce client with a widened, retrying connection pool.
+
+        simple_salesforce's default session keeps 10 pooled connections,
+        never retries, and silently discards connections when the pool is
+        full. Passing our own session in at construction gives every request
+        - including the client's own metadata calls - a larger blocking pool
+        (callers wait for a free connection instead of re-handshaking) and a
+        short retry budget for throttles and gateway errors.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter, Retry
+        from simple_salesforce import Salesforce
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=5,
+            pool_maxsize=25,
+            pool_block=True,
+            max_retries=Retry(total=2, backoff_factor=0.3,
+                              status_forcelist=[429, 502, 503, 504]),
+        )
+        session.mount('https://', adapter)
+        return Salesforce(instance_url=instance_url, session_id=session_id,
+                          session=session, version=SF_API_VERSION)
+
+    def _fail(self, msg: str) -> Dict[str, Any]:
+        """Record the ERROR transition and build the failure payload in one step."""
+        self.auth_context.update_state(AuthState.ERROR, msg)
+        return _err(msg)
+
+    def _run_login_flow(self, environment: Optional[str] = None) -> Dict[str, Any]:
+        """Execute the sequential login flow."""
         try:
             logger.debug("Starting login flow")
             # Initialize state
@@ -118,13 +300,18 @@ class LoginHandler:
                 
                 if not self.client_id:
                     logger.error("Configuration required - no client ID provided")
-                    self.auth_context.update_state(AuthState.ERROR, "Configuration required")
-                    return {
-                        "success": False,
-                        "error": "Configuration required. Please configure the Consumer Key."
-                    }
+                    return self._fail("Configuration required. Please configure the Consumer Key.")
             
-            # Step 2: Show environment selector if no environment provided
+            # Step 2: Reuse a cached token if one is still valid (or can be
+            # refreshed), skipping the interactive OAuth dance entirely
+            cached_sf = self._load_cached_token(environment)
+            if cached_sf is not None:
+                logger.info("Reusing cached Salesforce token")
+                self.sf = cached_sf
+                self.auth_context.update_state(AuthState.COMPLETED)
+                return dict(_OK)
+
+            # Step 3: Show environment selector if no environment provided
             if not environment:
                 logger.debug("No environment specified, showing selector")
                 from .environment_selector import EnvironmentSelector
@@ -133,18 +320,14 @@ class LoginHandler:
                 
                 if not selection:
                     logger.error("No environment selected")
-                    self.auth_context.update_state(AuthState.ERROR, "No environment selected")
-                    return {
-                        "success": False,
-                        "error": "Environment selection required"
-                    }
+                    return self._fail("Environment selection required")
                 
                 environment = selection["environment"]
-                logger.debug(f"Environment selected: {environment}")
+                logger.debug("Environment selected: %s", environment)
             
             self.auth_context.environment = environment
             
-            # Step 3: Start OAuth flow
+            # Step 4: Start OAuth flow
             logger.debug("Starting OAuth flow")
             self.auth_context.update_state(AuthState.OAUTH_FLOW)
             result = self._start_oauth_flow()
@@ -153,266 +336,347 @@ class LoginHandler:
                 logger.info("Login flow completed successfully")
                 self.auth_context.update_state(AuthState.COMPLETED)
             else:
-                logger.error(f"Login flow failed: {result['error']}")
+                logger.error("Login flow failed: %s", result["error"])
                 self.auth_context.update_state(AuthState.ERROR, result["error"])
             
             return result
             
         except Exception as e:
-            logger.error(f"Error in login flow: {str(e)}", exc_info=True)
-            self.auth_context.update_state(AuthState.ERROR, str(e))
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            logger.error("Error in login flow: %s", e, exc_info=True)
+            return self._fail(str(e))
 
     def _generate_state(self) -> str:
-        """Generate and store a new state token with timestamp."""
-        state = secrets.token_urlsafe(16)
-        self._states[state] = {
-            'timestamp': time.time(),
-            'used': False
-        }
-        self._cleanup_expired_states()
-        return state
+        """Issue a self-validating HMAC-signed state token.
+
+        The token carries its own nonce and issue time, so no per-flow
+        server-side record or cleanup pass is needed; memory stays O(1)
+        however many flows are in flight.
+        """
+        payload = secrets.token_bytes(_STATE_NONCE_LEN) + struct.pack('>Q', int(time.time()))
+        sig = hmac.new(self._state_secret, payload, hashlib.sha256).digest()[:_STATE_SIG_LEN]
+        return base64.urlsafe_b64encode(payload + sig).decode('ascii')
 
     def _validate_state(self, received_state: str) -> bool:
-        """Validate a received state token."""
-        if received_state not in self._states:
+        """Verify the signature, freshness, and single use of a state token."""
+        try:
+            raw = base64.urlsafe_b64decode(received_state.encode('ascii'))
+        except (ValueError, UnicodeEncodeError):
             return False
-        
-        state_data = self._states[received_state]
-        if state_data['used']:
+        if len(raw) != _STATE_PAYLOAD_LEN + _STATE_SIG_LEN:
             return False
-            
+
+        payload, sig = raw[:_STATE_PAYLOAD_LEN], raw[_STATE_PAYLOAD_LEN:]
+        expected = hmac.new(self._state_secret, payload, hashlib.sha256).digest()[:_STATE_SIG_LEN]
+        if not hmac.compare_digest(sig, expected):
+            return False
+
         # Check if state has expired (5 minute timeout)
-        if time.time() - state_data['timestamp'] > self._cleanup_interval:
-            del self._states[received_state]
+        issued_at = struct.unpack('>Q', payload[_STATE_NONCE_LEN:])[0]
+        if time.time() - issued_at > self._cleanup_interval:
             return False
-            
-        # Mark state as used
-        state_data['used'] = True
-        return True
 
-    def _cleanup_expired_states(self):
-        """Remove expired states."""
-        current_time = time.time()
-        expired_states = [
-            state for state, data in self._states.items()
-            if current_time - data['timestamp'] > self._cleanup_interval or data['used']
-        ]
-        for state in expired_states:
-            del self._states[state]
+        # Each token is single-use: remember its nonce, bounded FIFO
+        nonce = payload[:_STATE_NONCE_LEN]
+        if nonce in self._used_nonces:
+            return False
+        self._used_nonces[nonce] = True
+        while len(self._used_nonces) > _MAX_USED_NONCES:
+            self._used_nonces.popitem(last=False)
+        return True
 
     def _start_oauth_flow(self) -> Dict[str, Any]:
         """Start the OAuth flow."""
         try:
             state = self._generate_state()
-            logger.debug(f"Generated OAuth state: {state}")
+            logger.debug("Generated OAuth state: %s", state)
             
             # Start callback server first
             self._start_callback_server()
             logger.info("Started OAuth callback server")
             
             # Build OAuth URL based on selected environment
-            base_url = "https://test.salesforce.com" if self.auth_context.environment == "sandbox" else "https://login.salesforce.com"
+            base_url = _BASE_URLS.get(self.auth_context.environment, _BASE_URLS['production'])
             auth_url = f"{base_url}/services/oauth2/authorize"
-            logger.info(f"Using auth URL for {self.auth_context.environment}: {auth_url}")
-            
-            params = {
-                'response_type': 'token',
-                'client_id': self.client_id,
-                'redirect_uri': self.callback_url,
-                'state': state,  # Use new state
-                'scope': 'api full refresh_token',
-                'prompt': 'login consent select_account',
-                'display': 'page'
-            }
-            
-            full_url = f"{auth_url}?{urlencode(params)}"
-            logger.info(f"Generated OAuth URL: {full_url}")
-            
-            # Open browser with OAuth URL
-            webbrowser.open(full_url)
+            logger.info("Using auth URL for %s: %s", self.auth_context.environment, auth_url)
+
+            # state is already URL-safe base64; only the other two variable
+            # fields need quoting
+            full_url = (f"{auth_url}?{_STATIC_QUERY}"
+                        f"&client_id={quote(self.client_id, safe='')}"
+                        f"&redirect_uri={quote(self.callback_url, safe='')}"
+                        f"&state={state}")
+            logger.info("Generated OAuth URL: %s", full_url)
             
+            # Open the browser from a daemon thread: webbrowser.open can block
+            # for hundreds of ms while the OS resolves the default browser,
+            # and the callback wait below can start in parallel.
+            import webbrowser
+            threading.Thread(target=webbrowser.open, args=(full_url,),
+                             kwargs={'new': 2, 'autoraise': True},
+                             daemon=True).start()
+
             # Wait for callback
             if self._server.callback_received.wait(timeout=300):
-                callback_url = self._server.callback_url
-                logger.info(f"Received callback URL: {callback_url}")
-                self._server.shutdown()
-                self._server.server_close()
-                return self.handle_oauth_callback(callback_url)
+                params = self._server.callback_params
+                logger.info("Received OAuth callback")
+                # Leave the server listening for the next login round;
+                # clear_session() closes it for good.
+                return self._complete_auth(params)
             else:
                 logger.error("Timeout waiting for OAuth callback")
-                return {
-                    "success": False,
-                    "error": "Timeout waiting for authentication"
-                }
+                return _err("Timeout waiting for authentication")
                 
         except Exception as e:
-            logger.error(f"Error in OAuth flow: {str(e)}", exc_info=True)
-            if self._server:
-                self._server.shutdown()
-                self._server.server_close()
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            logger.error("Error in OAuth flow: %s", e, exc_info=True)
+            return _err(str(e))
 
     def handle_oauth_callback(self, callback_url: str) -> Dict[str, Any]:
-        """Handle the OAuth callback."""
+        """Handle an OAuth callback supplied as a URL with a fragment."""
+        parsed = urlparse(callback_url)
+        # Log only scheme and host: the fragment carries the access token
+        logger.info("Processing callback URL from %s://%s", parsed.scheme, parsed.netloc)
+
+        # Get the fragment from the URL
+        fragment = parsed.fragment
+
+        if not fragment:
+            logger.error("No fragment in callback URL")
+            return _err("Invalid callback URL format")
+
+        # Parse the fragment parameters; parse_qsl splits and
+        # percent-decodes in one pass instead of a Python-level loop
+        return self._complete_auth(dict(parse_qsl(fragment, keep_blank_values=True)))
+
+    def _complete_auth(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Finish the OAuth flow from already-parsed callback parameters."""
         try:
-            logger.info(f"Processing callback URL: {callback_url}")
-            
-            # Get the fragment from the URL
-            fragment = callback_url.split('#', 1)[1] if '#' in callback_url else ''
-            logger.info(f"Fragment: {fragment}")
-            
-            if not fragment:
-                logger.error("No fragment in callback URL")
-                return {
-                    "success": False,
-                    "error": "Invalid callback URL format"
-                }
-            
-            # Parse the fragment parameters
-            params = {}
-            for param in fragment.split('&'):
-                if '=' in param:
-                    key, value = param.split('=', 1)
-                    params[key] = unquote(value)
-            
-            logger.info(f"Parsed parameters: {params}")
-            
-            # Get tokens from fragment
+            # Log only the parameter names: the dict repr would serialize the
+            # multi-KB access token into the log on every login.
+            logger.debug("Parsed %d OAuth parameters: %s", len(params), sorted(params.keys()))
+
+            # Get tokens from the callback parameters
             access_token = params.get('access_token')
             instance_url = params.get('instance_url')
             received_state = params.get('state')
             
-            logger.info(f"Access Token: {access_token[:10]}... (truncated)")
-            logger.info(f"Instance URL: {instance_url}")
-            logger.info(f"Received State: {received_state}")
+            logger.info("Instance URL: %s", instance_url)
             
             if not access_token or not instance_url:
                 logger.error("No access token or instance URL received")
-                return {
-                    "success": False,
-                    "error": "Authentication failed - no access token received"
-                }
+                return _err("Authentication failed - no access token received")
                 
             if not received_state or not self._validate_state(received_state):
-                logger.error(f"Invalid state received: {received_state}")
-                return {
-                    "success": False,
-                    "error": "Invalid state parameter - possible CSRF attempt"
-                }
+                logger.error("Invalid state received: %s", received_state)
+                return _err("Invalid state parameter - possible CSRF attempt")
             
             # Initialize Salesforce client with tokens
-            self.sf = Salesforce(
-                instance_url=instance_url,
-                session_id=access_token
-            )
-            
+            self.sf = self._build_sf_client(instance_url, access_token)
+
+            # Cache the token so the next session can skip the browser flow
+            now = time.time()
+            self._save_cached_token({
+                'access_token': access_token,
+                'refresh_token': params.get('refresh_token'),
+                'instance_url': instance_url,
+                'environment': self.auth_context.environment,
+                'issued_at': now,
+                'expires_at': now + TOKEN_LIFETIME,
+            })
+
             logger.info("Successfully authenticated with Salesforce")
-            return {
-                "success": True,
-                "message": "Successfully authenticated with Salesforce"
-            }
+            return dict(_OK)
             
         except Exception as e:
-            logger.error(f"Error handling OAuth callback: {str(e)}", exc_info=True)
-            return {
-                "success": False,
-                "error": str(e)
-            }
+            logger.error("Error handling OAuth callback: %s", e, exc_info=True)
+            return _err(str(e))
 
     def _load_configuration(self) -> Optional[str]:
-        """Load the Consumer Key from secure storage."""
-        try:
-            logger.debug("Loading configuration from keyring")
-            return keyring.get_password(CONFIG_SERVICE_NAME, CONFIG_KEY_NAME)
-        except Exception as e:
-            logger.error(f"Error loading configuration: {str(e)}")
-            return None
+        """Load the Consumer Key from secure storage, caching it in memory."""
+        with self._config_lock:
+            if (self._consumer_key_cache is not None
+                    and time.time() - self._consumer_key_cache_ts < CONFIG_CACHE_TTL):
+                return self._consumer_key_cache
+            try:
+                logger.debug("Loading configuration from keyring")
+                consumer_key = self._keyring().get_password(CONFIG_SERVICE_NAME, CONFIG_KEY_NAME)
+            except Exception as e:
+                logger.error("Error loading configuration: %s", e)
+                return None
+            if consumer_key:
+                self._consumer_key_cache = consumer_key
+                self._consumer_key_cache_ts = time.time()
+            return consumer_key
 
     def _save_configuration(self, consumer_key: str) -> bool:
         """Save the Consumer Key to secure storage."""
         try:
             logger.debug("Saving configuration to keyring")
-            keyring.set_password(CONFIG_SERVICE_NAME, CONFIG_KEY_NAME, consumer_key)
+            self._keyring().set_password(CONFIG_SERVICE_NAME, CONFIG_KEY_NAME, consumer_key)
+            with self._config_lock:
+                self._consumer_key_cache = consumer_key
+                self._consumer_key_cache_ts = time.time()
             return True
         except Exception as e:
-            logger.error(f"Error saving configuration: {str(e)}")
+            logger.error("Error saving configuration: %s", e)
             return False
 
+    def _save_cached_token(self, token: Dict[str, Any]) -> None:
+        """Persist the token blob to secure storage and the auth context."""
+        self.auth_context.environment = token.get('environment', self.auth_context.environment)
+        self.auth_context.instance_url = token.get('instance_url')
+        self.auth_context.access_token = token.get('access_token')
+        self.auth_context.refresh_token = token.get('refresh_token')
+        self.auth_context.expires_at = token.get('expires_at', 0.0)
+        try:
+            logger.debug("Caching Salesforce token in keyring")
+            self._keyring().set_password(CONFIG_SERVICE_NAME, TOKEN_KEY_NAME, json.dumps(token))
+        except Exception as e:
+            logger.error("Error caching token: %s", e)
+
+    def _load_cached_token(self, environment: Optional[str] = None) -> Optional["Salesforce"]:
+        """Return a client built from the cached token if it is still usable.
+
+        Falls back to a refresh-token exchange when the access token is near
+        expiry, and returns None when the cache is empty, expired without a
+        refresh token, or was issued for a different environment.
+        """
+        try:
+            blob = self._keyring().get_password(CONFIG_SERVICE_NAME, TOKEN_KEY_NAME)
+            if not blob:
+                return None
+            token = json.loads(blob)
+        except Exception as e:
+            logger.error("Error loading cached token: %s", e)
+            return None
+
+        if environment and token.get('environment') != environment:
+            logger.debug("Cached token is for a different environment, ignoring")
+            return None
+
+        if token.get('expires_at', 0) - time.time() > 60:
+            self._save_cached_token(token)
+            return self._build_sf_client(token['instance_url'], token['access_token'])
+
+        if token.get('refresh_token'):
+            return self._refresh_access_token(token)
+
+        return None
+
+    def _refresh_access_token(self, token: Dict[str, Any]) -> Optional["Salesforce"]:
+        """Exchange the cached refresh token for a fresh access token."""
+        import requests
+
+        base_url = _BASE_URLS.get(token.get('environment'), _BASE_URLS['production'])
+        client_id = self.client_id or self._load_configuration()
+        if not client_id:
+            return None
+        try:
+            logger.debug("Refreshing Salesforce access token")
+            response = requests.post(
+                f"{base_url}/services/oauth2/token",
+                data={
+                    'grant_type': 'refresh_token',
+                    'client_id': client_id,
+                    'refresh_token': token['refresh_token'],
+                },
+                timeout=30
+            )
+        except requests.RequestException as e:
+            logger.error("Error refreshing access token: %s", e)
+            return None
+
+        if response.status_code != 200:
+            logger.error("Token refresh failed with status %s", response.status_code)
+            return None
+
+        payload = response.json()
+        now = time.time()
+        token.update({
+            'access_token': payload['access_token'],
+            'instance_url': payload.get('instance_url', token.get('instance_url')),
+            'issued_at': now,
+            'expires_at': now + TOKEN_LIFETIME,
+        })
+        self._save_cached_token(token)
+        logger.info("Refreshed Salesforce access token")
+        return self._build_sf_client(token['instance_url'], token['access_token'])
+
     def _show_configuration_screen(self) -> Optional[str]:
         """Show configuration screen to get Consumer Key from user."""
         try:
             logger.debug("Showing configuration screen")
-            # Create configuration server
-            server = HTTPServer(('localhost', 8788), ConfigurationHandler)
-            server.config_received = threading.Event()
-            server.consumer_key = None
-            
-            # Start server thread
-            thread = threading.Thread(target=server.serve_forever)
-            thread.daemon = True
-            thread.start()
-
-            # Open browser to configuration page
-            webbrowser.open('http://localhost:8788')
+            with _temp_http_server(8788, ConfigurationHandler,
+                                   config_received=threading.Event(),
+                                   consumer_key=None) as server:
+                # Open browser to configuration page
+                import webbrowser
+                webbrowser.open('http://localhost:8788')
 
-            # Wait for configuration
-            if server.config_received.wait(timeout=300):  # 5 minute timeout
-                consumer_key = server.consumer_key
-                server.shutdown()
-                server.server_close()
-
-                if consumer_key:
-                    # Save the configuration
-                    if self._save_configuration(consumer_key):
+                # Wait for configuration (5 minute timeout)
+                if server.config_received.wait(timeout=300):
+                    consumer_key = server.consumer_key
+                    if consumer_key and self._save_configuration(consumer_key):
                         logger.info("Successfully saved consumer key")
                         return consumer_key
-            return None
+                return None
         except Exception as e:
-            logger.error(f"Error in configuration screen: {str(e)}", exc_info=True)
+            logger.error("Error in configuration screen: %s", e, exc_info=True)
             return None
-        finally:
-            try:
-                server.shutdown()
-                server.server_close()
-            except:
-                pass
 
     def _start_callback_server(self) -> None:
-        """Start local server to handle OAuth callback."""
+        """Start (or reuse) the local server that handles the OAuth callback.
+
+        The server is created once and kept listening across login attempts;
+        subsequent flows just reset its per-round state, avoiding a fresh
+        socket bind and serving thread per login.
+        """
         try:
+            if self._server is not None:
+                logger.debug("Reusing existing OAuth callback server")
+                self._server.callback_received.clear()
+                self._server.callback_params = None
+                return
+
             logger.debug("Starting OAuth callback server")
-            server = HTTPServer(('localhost', 8787), OAuthCallbackHandler)
+            server = CallbackServer(('localhost', 8787), OAuthCallbackHandler)
             server.callback_received = threading.Event()
-            server.callback_url = None
-            
+            server.callback_params = None
+
             thread = threading.Thread(target=server.serve_forever)
             thread.daemon = True
             thread.start()
-            
+
             self._server = server
             self._server_thread = thread
             logger.debug("OAuth callback server started successfully")
-            
+
         except Exception as e:
-            logger.error(f"Error starting callback server: {str(e)}", exc_info=True)
+            logger.error("Error starting callback server: %s", e, exc_info=True)
             raise
 
     def clear_session(self):
         """Clear the current session."""
         logger.debug("Clearing session")
         self.sf = None
-        self._state = None
+        self._used_nonces.clear()
+        try:
+            self._keyring().delete_password(CONFIG_SERVICE_NAME, TOKEN_KEY_NAME)
+        except Exception:
+            pass
         if self._server:
             self._server.shutdown()
             self._server.server_close()
+            self._server = None
+            self._server_thread = None
         
-    def get_sf(self) -> Optional[Salesforce]:
-        """Get the Salesforce client instance."""
+    def get_sf(self) -> Optional["Salesforce"]:
+        """Get the Salesforce client, refreshing it when the token is stale.
+
+        The cached client is returned as-is until the in-memory expiry check
+        trips; then the cached-token path rebuilds it (via the refresh token
+        when possible) so tools don't hit the API with a dead session.
+        """
+        if self.sf is not None and self.auth_context.is_expired:
+            logger.info("Cached Salesforce session near expiry, rebuilding client")
+            self.sf = self._load_cached_token(self.auth_context.environment)
         return self.sf
\ No newline at end of file
@@ -2,47 +2,113 @@
 import re
 from typing import Tuple, Optional
 
+# List of forbidden operations
+FORBIDDEN_OPERATIONS = [
+    'INSERT', 'UPDATE', 'DELETE', 'UPSERT', 'MERGE', 'UNDELETE',
+    'CREATE', 'MODIFY', 'TRUNCATE'
+]
+
+# Compiled once at import: a single alternation replaces nine per-call
+# re.search invocations, and the match tells us which operation tripped.
+_FORBIDDEN_RE = re.compile(r'\b(' + '|'.join(FORBIDDEN_OPERATIONS) + r')\b')
+_COUNT_RE = re.compile(r'COUNT\s*\(([^)]*)\)')
+_MULTI_STMT_RE = re.compile(r';\s*\w+')
+_LIMIT_RE = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+# Aggregate classification anchored at the SELECT list, so an aggregate
+# expression inside a WHERE subquery doesn't misclassify a row query.
+_AGG_RE = re.compile(
+    r'SELECT\s+(COUNT|COUNT_DISTINCT|SUM|AVG|MIN|MAX)\s*\(', re.IGNORECASE)
+# First FROM object; drives cache revalidation probes downstream.
+_FROM_RE = re.compile(r'\bFROM\s+(\w+)', re.IGNORECASE)
+
+class SoqlShape:
+    """Structural facts about a validated query, gathered in one pass.
+
+    Callers read these instead of re-scanning the query text for LIMIT,
+    aggregate functions, or the FROM object.
+    """
+    __slots__ = ('has_limit', 'is_aggregate', 'is_count', 'from_object')
+
+    def __init__(self, has_limit: bool, is_aggregate: bool, is_count: bool,
+                 from_object: Optional[str]):
+        # has_limit reflects the caller's query, before any default LIMIT
+        # the validator appends
+        self.has_limit = has_limit
+        self.is_aggregate = is_aggregate
+        self.is_count = is_count
+        self.from_object = from_object
+
 class QueryValidator:
-    # List of forbidden operations
-    FORBIDDEN_OPERATIONS = [
-        'INSERT', 'UPDATE', 'DELETE', 'UPSERT', 'MERGE', 'UNDELETE',
-        'CREATE', 'MODIFY', 'TRUNCATE'
-    ]
+    # Kept for callers that introspect the rule list
+    FORBIDDEN_OPERATIONS = FORBIDDEN_OPERATIONS
+
+    # Default row cap appended to queries that specify neither LIMIT nor COUNT
+    DEFAULT_LIMIT = 200
+
+    @staticmethod
+    def is_aggregate(soql: str) -> bool:
+        """Return True when the query's SELECT list starts with an aggregate.
+
+        Aggregates return a single summary row, so they skip the default
+        LIMIT and callers may cache them on a longer TTL.
+        """
+        return bool(_AGG_RE.match(soql.lstrip()))
 
     @staticmethod
-    def validate_query(soql: str) -> Tuple[bool, Optional[str]]:
+    def validate_query(soql: str) -> Tuple[bool, Optional[str], str, Optional['SoqlShape']]:
         """
         Validate a SOQL query against security and performance rules.
-        Returns (is_valid, error_message)
+        Returns (is_valid, error_message, soql, shape); on success the
+        returned SOQL has LIMIT 200 appended when the query has neither a
+        LIMIT clause nor an aggregate SELECT list, and shape carries the
+        structural facts (LIMIT, aggregate-ness, FROM object) so callers
+        never rescan the text. Shape is None on rejection.
         """
+        stripped = soql.strip()
+
+        # Cheap rejections first: a 6-character prefix check and the
+        # case-agnostic multi-statement scan both run on the original text,
+        # so invalid queries never pay for a full uppercase copy.
+        if stripped[:6].upper() != 'SELECT':
+            return False, "Only SELECT queries are allowed. DML operations are not permitted.", soql, None
+
+        # Block potential SQL injection attempts (multiple statements)
+        if _MULTI_STMT_RE.search(stripped):
+            return False, "Multiple SQL statements are not allowed", soql, None
+
         # Convert to uppercase for easier pattern matching
-        soql_upper = soql.upper().strip()
-        
-        # Check if this is a SELECT query
-        if not soql_upper.startswith('SELECT'):
-            return False, "Only SELECT queries are allowed. DML operations are not permitted."
-            
+        soql_upper = stripped.upper()
+
         # Check for any forbidden operations using word boundaries
-        for operation in QueryValidator.FORBIDDEN_OPERATIONS:
-            # Use word boundaries \b to match whole words only
-            if re.search(rf'\b{operation}\b', soql_upper):
-                return False, f"{operation} operations are not permitted. Only SELECT queries are allowed."
-            
-        # Check for COUNT queries
-        count_match = re.search(r'COUNT\s*\(([^)]*)\)', soql_upper)
-        if count_match:
-            # Verify COUNT has a field specified
-            count_field = count_match.group(1).strip()
-            if not count_field:
-                return False, "COUNT queries must specify a field to count (e.g., COUNT(Id))"
-                
-            # Verify COUNT has WHERE clause
-            if 'WHERE' not in soql_upper:
-                return False, "COUNT queries must include a WHERE clause for performance reasons"
-
-        # Additional security checks
-        # Block potential SQL injection attempts
-        if re.search(r';\s*\w+', soql):  # Check for multiple statements
-            return False, "Multiple SQL statements are not allowed"
-                
-        return True, None
\ No newline at end of file
+        forbidden = _FORBIDDEN_RE.search(soql_upper)
+        if forbidden:
+            return False, f"{forbidden.group(1)} operations are not permitted. Only SELECT queries are allowed.", soql, None
+
+        # Check for COUNT queries; the substring guard keeps the regex off
+        # the common path, since most SELECT queries never mention COUNT
+        if 'COUNT' in soql_upper:
+            count_match = _COUNT_RE.search(soql_upper)
+            if count_match:
+                # Verify COUNT has a field specified
+                count_field = count_match.group(1).strip()
+                if not count_field:
+                    return False, "COUNT queries must specify a field to count (e.g., COUNT(Id))", soql, None
+
+                # Verify COUNT has WHERE clause
+                if 'WHERE' not in soql_upper:
+                    return False, "COUNT queries must include a WHERE clause for performance reasons", soql, None
+
+        agg_match = _AGG_RE.match(stripped)
+        from_match = _FROM_RE.search(stripped)
+        shape = SoqlShape(
+            has_limit=bool(_LIMIT_RE.search(stripped)),
+            is_aggregate=agg_match is not None,
+            is_count=bool(agg_match) and agg_match.group(1).upper().startswith('COUNT'),
+            from_object=from_match.group(1) if from_match else None,
+        )
+
+        # Cap result size unless the caller already did (or is aggregating)
+        if not shape.has_limit and not shape.is_aggregate:
+            soql = f"{soql.rstrip()} LIMIT {QueryValidator.DEFAULT_LIMIT}"
+
+        return True, None, soql, shape
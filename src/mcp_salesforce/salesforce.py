@@ -12,22 +12,28 @@ class SalesforceClient:
         self.access_token = access_token
         self.api_version = "v58.0"
         self.validator = QueryValidator()
-        
+        # Persistent session: reuses the TLS connection to the instance and
+        # carries the auth headers, instead of a handshake per query.
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        })
+
+    def close(self) -> None:
+        """Close the underlying HTTP session and its connection pool."""
+        self._session.close()
+
     def query(self, soql: str) -> Dict[str, Any]:
         """Execute a SOQL query."""
-        # Validate query first
-        is_valid, error_message = self.validator.validate_query(soql)
+        # Validate query first; the validator may append a default LIMIT
+        is_valid, error_message, soql, _shape = self.validator.validate_query(soql)
         if not is_valid:
             raise ValueError(error_message)
-            
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
+
         url = f"{self.instance_url}/services/data/{self.api_version}/query"
-        response = requests.get(url, headers=headers, params={"q": soql})
-        
+        response = self._session.get(url, params={"q": soql})
+
         if response.status_code == 200:
             return response.json()
         else:
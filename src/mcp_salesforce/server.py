@@ -1,27 +1,36 @@
 """MCP Salesforce Extension for Goose."""
+import asyncio
+import atexit
+import collections
+import functools
+import itertools
 import logging
+import logging.handlers
 import os
+import queue
+import re
+import time
 from typing import Dict, Any, Optional
-import webbrowser
+from urllib.parse import quote
 from mcp.server.fastmcp.server import FastMCP
-from simple_salesforce import Salesforce
 from .login_handler import LoginHandler
 from .query_validator import QueryValidator
 
 logger = logging.getLogger(__name__)
 
-class MCPSalesforceExtension(FastMCP):
-    """MCP Salesforce Extension."""
+_HINTS_PATH = os.path.join(os.path.dirname(__file__), 'goose_hints.md')
 
-    def __init__(self):
-        """Initialize the extension."""
-        # Read the hints file
-        hints_path = os.path.join(os.path.dirname(__file__), 'goose_hints.md')
-        with open(hints_path, 'r') as f:
-            hints_content = f.read()
-        
-        # Create comprehensive system instructions with hints
-        system_instructions = f"""MCP Salesforce Extension.
+@functools.lru_cache(maxsize=1)
+def _build_system_instructions() -> str:
+    """Read the hints file and build the system instructions once.
+
+    The hints are static for the process lifetime; caching spares repeat
+    instantiations (tests, restarts) the disk read and string build.
+    """
+    with open(_HINTS_PATH, 'r') as f:
+        hints_content = f.read()
+
+    return f"""MCP Salesforce Extension.
 
 IMPORTANT: Always follow these query patterns and best practices for any SOQL query:
 
@@ -29,146 +38,404 @@ IMPORTANT: Always follow these query patterns and best practices for any SOQL qu
 
 These patterns must be followed for every query. Validate all queries against these patterns before execution.
 """
-        
+
+# Result-cache tuning: a short TTL absorbs the agent habit of re-issuing the
+# same read back-to-back without serving meaningfully stale data. Aggregate
+# queries return one summary row and tolerate more staleness, so they get a
+# longer TTL.
+_QUERY_CACHE_TTL = 60
+_AGG_QUERY_CACHE_TTL = 300
+_QUERY_CACHE_MAX = 128
+# Entries older than their TTL but younger than TTL * _STALE_FACTOR are
+# revalidated with a cheap SystemModstamp probe instead of re-fetched.
+_STALE_FACTOR = 5
+
+def _object_unchanged(sf, sobject: str, since: float) -> bool:
+    """Probe whether any row of sobject changed since the cache entry.
+
+    A COUNT() over SystemModstamp returns a single number, so the probe
+    costs one tiny round trip against re-fetching the whole result set.
+    Objects without SystemModstamp (or any probe failure) count as
+    changed, which safely falls back to a re-fetch.
+    """
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(since))
+    probe = f"SELECT COUNT() FROM {sobject} WHERE SystemModstamp > {stamp}"
+    try:
+        return sf.query(probe)['totalSize'] == 0
+    except Exception:
+        return False
+
+# Hard cap on rows returned to the client; queries wanting more should
+# narrow their WHERE clause or paginate with explicit LIMIT/OFFSET.
+_MAX_ROWS = 2000
+
+def _fetch_records(sf, soql: str) -> Dict[str, Any]:
+    """Stream query results up to _MAX_ROWS instead of buffering them all.
+
+    query_all_iter pages through the API lazily, so a runaway query costs
+    one extra row of memory past the cap rather than the full result set.
+    Runs on a worker thread; returns a query_all-shaped dict plus a
+    "truncated" flag when rows were dropped.
+    """
+    records = list(itertools.islice(sf.query_all_iter(soql), _MAX_ROWS + 1))
+    truncated = len(records) > _MAX_ROWS
+    if truncated:
+        del records[_MAX_ROWS:]
+    return {
+        "totalSize": len(records),
+        "done": not truncated,
+        "records": records,
+        "truncated": truncated,
+    }
+
+# Whitespace collapser for the cache key only: queries differing in
+# indentation or line breaks hit the same entry. The collapsed form is
+# never executed, since whitespace inside string literals is significant.
+_WS_RE = re.compile(r'\s+')
+
+def _cache_key(soql: str) -> str:
+    """Collapse whitespace outside single-quoted literals for the cache key.
+
+    'Acme  Inc' and 'Acme Inc' are different values, so runs inside
+    quotes must survive. Queries with backslash escapes defeat the cheap
+    quote split, and those keep their exact text as the key — missing a
+    cache hit is safe, sharing one between different queries is not.
+    """
+    if "'" not in soql:
+        return _WS_RE.sub(' ', soql)
+    if '\\' in soql or soql.count("'") % 2:
+        return soql
+    segments = soql.split("'")
+    # Even indexes sit outside the quoted literals
+    for i in range(0, len(segments), 2):
+        segments[i] = _WS_RE.sub(' ', segments[i])
+    return "'".join(segments)
+
+# Micro-batching window and the composite/batch subrequest ceiling.
+_BATCH_WINDOW = 0.02
+_BATCH_MAX = 25
+
+def _normalize_batch_result(sf, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Bring a composite subresult to the same shape and cap as _fetch_records.
+
+    The composite API returns only the first page of each query; follow
+    nextRecordsUrl up to _MAX_ROWS so a query answers identically whether
+    it ran solo or in a burst, and never caches a silently partial page.
+    """
+    records = list(result.get("records", []))
+    next_url = result.get("nextRecordsUrl")
+    while next_url and len(records) <= _MAX_ROWS:
+        page = sf.query_more(next_url, identifier_is_url=True)
+        records.extend(page.get("records", []))
+        next_url = page.get("nextRecordsUrl")
+    truncated = len(records) > _MAX_ROWS
+    if truncated:
+        del records[_MAX_ROWS:]
+    return {
+        "totalSize": len(records),
+        "done": not truncated,
+        "records": records,
+        "truncated": truncated,
+    }
+
+def _run_batch(sf, soqls) -> list:
+    """POST one composite/batch call covering every coalesced query.
+
+    Runs on a worker thread. Returns the per-subrequest results list in
+    the same order the queries were queued, with each successful result
+    normalized to the _fetch_records shape.
+    """
+    body = {
+        "batchRequests": [
+            {"method": "GET", "url": f"v{sf.sf_version}/query?q={quote(soql)}"}
+            for soql in soqls
+        ]
+    }
+    response = sf.restful("composite/batch", method="POST", json=body)
+    results = []
+    for item in response["results"]:
+        if item.get("statusCode", 500) < 300:
+            item = dict(item, result=_normalize_batch_result(sf, item.get("result") or {}))
+        results.append(item)
+    return results
+
+class _QueryBatcher:
+    """Coalesce concurrent SOQL queries into one composite/batch round trip.
+
+    Cache-missing queries that arrive within a 20ms window share a single
+    POST (up to the 25-subrequest composite limit); each caller awaits its
+    own future. A query that ends the window alone takes the direct
+    streaming path, so the batcher adds nothing to the common
+    single-query case. All bookkeeping happens on the event loop thread —
+    only the HTTP call itself moves to a worker.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._flush_handle = None
+
+    async def execute(self, sf, soql: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((sf, soql, future))
+        if len(self._pending) >= _BATCH_MAX:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(_BATCH_WINDOW, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            asyncio.get_running_loop().create_task(self._dispatch(pending))
+
+    async def _dispatch(self, pending):
+        if len(pending) == 1:
+            sf, soql, future = pending[0]
+            try:
+                result = await asyncio.to_thread(_fetch_records, sf, soql)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            return
+
+        logger.info("Dispatching %d queries as one composite batch", len(pending))
+        sf = pending[0][0]
+        try:
+            results = await asyncio.to_thread(_run_batch, sf, [p[1] for p in pending])
+        except Exception as e:
+            for _, _, future in pending:
+                future.set_exception(e)
+            return
+        for (_, _, future), item in zip(pending, results):
+            if item.get("statusCode", 500) < 300:
+                future.set_result(item.get("result"))
+            else:
+                future.set_exception(Exception(str(item.get("result"))))
+
+@functools.lru_cache(maxsize=512)
+def _prepare_soql(soql: str) -> tuple:
+    """Validate and LIMIT-rewrite a query, caching by exact query text.
+
+    Validation is pure and CPU-bound, and agents tend to repeat identical
+    or template-like SOQL; the cache skips the regex sweep on repeats.
+    """
+    return QueryValidator.validate_query(soql)
+
+class MCPSalesforceExtension(FastMCP):
+    """MCP Salesforce Extension."""
+
+    def __init__(self):
+        """Initialize the extension."""
         super().__init__(
             name="mcp_salesforce",
             display_name="MCP Salesforce",
             description="Salesforce integration for Goose - Read-only operations",
-            system_instructions=system_instructions,
+            system_instructions=_build_system_instructions(),
         )
         self.login_handler = LoginHandler()
+        # TTL result cache for idempotent reads: soql -> (expires_at, results)
+        self._query_cache = collections.OrderedDict()
+        self._query_batcher = _QueryBatcher()
         self._setup_tools()
-        
+
+    def _cached_results(self, soql: str):
+        """Look up cached results for a query.
+
+        Returns None on a miss, or (results, is_stale, stored_at): fresh
+        entries serve directly, stale ones (past their TTL but inside the
+        revalidation window) may be reused after a modstamp probe.
+        """
+        entry = self._query_cache.get(soql)
+        if entry is None:
+            return None
+        stored_at, ttl, results = entry
+        age = time.time() - stored_at
+        if age < ttl:
+            return results, False, stored_at
+        if age < ttl * _STALE_FACTOR:
+            return results, True, stored_at
+        del self._query_cache[soql]
+        return None
+
+    def _store_results(self, soql: str, results: Dict[str, Any],
+                       ttl: float = _QUERY_CACHE_TTL) -> None:
+        """Cache query results with a TTL, evicting the oldest past the cap."""
+        cache = self._query_cache
+        cache[soql] = (time.time(), ttl, results)
+        cache.move_to_end(soql)
+        while len(cache) > _QUERY_CACHE_MAX:
+            cache.popitem(last=False)
+
+    def _clear_query_cache(self) -> None:
+        """Drop all cached results; called on logout, session expiry, and
+        successful (re)login, since a new session may target another org."""
+        self._query_cache.clear()
+
     def _setup_tools(self):
-        """Set up the extension's tools."""
-        @self.tool("mcp_salesforce_login")
-        async def login(
-            environment: str = None
-        ) -> dict:
-            """Login to Salesforce."""
-            try:
-                # Show environment selector if not provided
-                if not environment:
-                    from .environment_selector import EnvironmentSelector
-                    selector = EnvironmentSelector()
-                    result = selector.show()
-                    
-                    if not result or result.get("environment") == "cancel":
-                        return {
-                            "success": False,
-                            "error": "Login cancelled"
-                        }
-                    
-                    environment = result["environment"]
-                
-                # Start login flow with selected environment
-                return self.login_handler.start_login_flow(environment)
-                
-            except Exception as e:
-                logger.error(f"Login failed: {str(e)}")
-                return {"success": False, "error": str(e)}
-
-        @self.tool("mcp_salesforce_handle_oauth")
-        async def handle_oauth(
-            callback_url: str
-        ) -> dict:
-            """Handle OAuth callback."""
-            try:
-                return self.login_handler.handle_oauth_callback(callback_url)
-            except Exception as e:
-                logger.error(f"OAuth callback failed: {str(e)}")
-                return {"success": False, "error": str(e)}
+        """Set up the extension's tools.
+
+        The tools are bound methods instead of per-instance closures, so the
+        function objects (and their schemas) live on the class rather than
+        being rebuilt for every instantiation.
+        """
+        self.tool("mcp_salesforce_login")(self._login_tool)
+        self.tool("mcp_salesforce_handle_oauth")(self._handle_oauth_tool)
+        self.tool("mcp_salesforce_logout")(self._logout_tool)
+        self.tool("mcp_salesforce_query")(self._query_tool)
+        self.tool("mcp_salesforce_search")(self._search_tool)
+
+    async def _login_tool(self, environment: str = None) -> dict:
+        """Login to Salesforce."""
+        try:
+            # The login flow owns environment selection; it shows the
+            # selector itself when no environment is passed
+            result = await self.login_handler.start_login_flow_async(environment)
+            if result.get("success"):
+                # A relogin can land in a different org; cached rows from
+                # the previous one must not survive the switch
+                self._clear_query_cache()
+            return result
+
+        except Exception as e:
+            logger.error("Login failed: %s", e)
+            return {"success": False, "error": str(e)}
 
-        @self.tool("mcp_salesforce_logout")
-        async def logout() -> dict:
-            """Logout from Salesforce."""
+    async def _handle_oauth_tool(self, callback_url: str) -> dict:
+        """Handle OAuth callback."""
+        try:
+            result = await self.login_handler.handle_oauth_callback_async(callback_url)
+            if result.get("success"):
+                self._clear_query_cache()
+            return result
+        except Exception as e:
+            logger.error("OAuth callback failed: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def _logout_tool(self) -> dict:
+        """Logout from Salesforce."""
+        try:
+            self.login_handler.clear_session()
+            self._clear_query_cache()
+            return {"success": True, "message": "Successfully logged out"}
+        except Exception as e:
+            logger.error("Logout failed: %s", e)
+            return {"success": False, "error": str(e)}
+
+    async def _query_tool(self, soql: str) -> dict:
+        """Execute a SOQL query with safety features."""
+        # Cheap after the first call (sys.modules hit); keeping it out of
+        # module scope keeps simple_salesforce off the server's cold start
+        from simple_salesforce.exceptions import SalesforceExpiredSession
+        try:
+            # get_sf can hit keyring IPC and a refresh-token exchange when
+            # the in-memory client has expired; keep that off the event loop
+            sf = await asyncio.to_thread(self.login_handler.get_sf)
+            if not sf:
+                return {
+                    "success": False,
+                    "error": "Not authenticated. Please login first using mcp_salesforce_login"
+                }
+
+            # Validation and LIMIT injection both live in QueryValidator,
+            # so the query text is scanned once (and cached for repeats).
+            # A stray trailing semicolon is dropped up front so it neither
+            # reaches the API nor splits the cache key space.
+            is_valid, error_message, soql, shape = _prepare_soql(soql.strip().rstrip(';'))
+            if not is_valid:
+                return {
+                    "success": False,
+                    "error": error_message
+                }
+
+            # Serve repeated reads from the TTL cache. Aggregates are
+            # classified by query shape (not a blunt COUNT substring match)
+            # and cached on the longer TTL.
+            ttl = _AGG_QUERY_CACHE_TTL if shape.is_aggregate else _QUERY_CACHE_TTL
+            cache_key = _cache_key(soql)
+            cached = self._cached_results(cache_key)
+            if cached is not None:
+                results, stale, stored_at = cached
+                if not stale:
+                    logger.info("Serving SOQL results from cache")
+                    return {"success": True, "results": results}
+                # Stale but inside the revalidation window: reuse the entry
+                # if nothing on the FROM object changed since it was stored.
+                # Re-storing also resets the TTL, so probes happen at most
+                # once per TTL per entry.
+                if shape.from_object and await asyncio.to_thread(
+                        _object_unchanged, sf, shape.from_object, stored_at):
+                    logger.info("Revalidated cached SOQL results for %s",
+                                shape.from_object)
+                    self._store_results(cache_key, results, ttl)
+                    return {"success": True, "results": results}
+
+            # Execute query
             try:
+                logger.info("Executing SOQL query: %s", soql)
+                # Bursts of concurrent queries coalesce into one composite
+                # call; a lone query streams directly off a worker thread
+                results = await self._query_batcher.execute(sf, soql)
+                self._store_results(cache_key, results, ttl)
+                return {"success": True, "results": results}
+            except SalesforceExpiredSession:
+                # Session management - handle expired sessions. Typed
+                # dispatch avoids stringifying the full response body just
+                # to substring-match INVALID_SESSION_ID.
+                logger.warning("Session expired, clearing session")
                 self.login_handler.clear_session()
-                return {"success": True, "message": "Successfully logged out"}
+                self._clear_query_cache()
+                return {
+                    "success": False,
+                    "error": "Session expired. Please login again."
+                }
             except Exception as e:
-                logger.error(f"Logout failed: {str(e)}")
-                return {"success": False, "error": str(e)}
-
-        @self.tool("mcp_salesforce_query")
-        async def query(soql: str) -> dict:
-            """Execute a SOQL query with safety features."""
-            try:
-                sf = self.login_handler.get_sf()
-                if not sf:
-                    return {
-                        "success": False,
-                        "error": "Not authenticated. Please login first using mcp_salesforce_login"
-                    }
-
-                # Use QueryValidator for comprehensive validation
-                is_valid, error_message = QueryValidator.validate_query(soql)
-                if not is_valid:
-                    return {
-                        "success": False,
-                        "error": error_message
-                    }
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
                 
-                # Add LIMIT if not present and not a COUNT query
-                soql_upper = soql.upper().strip()
-                if 'LIMIT' not in soql_upper and 'COUNT(' not in soql_upper:
-                    soql = f"{soql.rstrip()} LIMIT 200"
-                    logger.info(f"Added LIMIT clause. Modified query: {soql}")
-                
-                # Execute query
-                try:
-                    logger.info(f"Executing SOQL query: {soql}")
-                    results = sf.query_all(soql)
-                    return {"success": True, "results": results}
-                except Exception as e:
-                    # Session management - handle expired sessions
-                    if "INVALID_SESSION_ID" in str(e):
-                        logger.warning("Session expired, clearing session")
-                        self.login_handler.clear_session()
-                        return {
-                            "success": False,
-                            "error": "Session expired. Please login again."
-                        }
-                    return {
-                        "success": False,
-                        "error": str(e)
-                    }
-                    
-            except Exception as e:
-                logger.error(f"Query failed: {str(e)}")
-                return {"success": False, "error": str(e)}
+        except Exception as e:
+            logger.error("Query failed: %s", e)
+            return {"success": False, "error": str(e)}
 
-        @self.tool("mcp_salesforce_search")
-        async def search(search_term: str) -> dict:
-            """Execute a SOSL search."""
+    async def _search_tool(self, search_term: str) -> dict:
+        """Execute a SOSL search."""
+        from simple_salesforce.exceptions import SalesforceExpiredSession
+        try:
+            sf = await asyncio.to_thread(self.login_handler.get_sf)
+            if not sf:
+                return {
+                    "success": False,
+                    "error": "Not authenticated. Please login first using mcp_salesforce_login"
+                }
+            
             try:
-                sf = self.login_handler.get_sf()
-                if not sf:
-                    return {
-                        "success": False,
-                        "error": "Not authenticated. Please login first using mcp_salesforce_login"
-                    }
-                
-                try:
-                    logger.info(f"Executing SOSL search: {search_term}")
-                    results = sf.search(search_term)
-                    return {"success": True, "results": results}
-                except Exception as e:
-                    # Session management - handle expired sessions
-                    if "INVALID_SESSION_ID" in str(e):
-                        logger.warning("Session expired, clearing session")
-                        self.login_handler.clear_session()
-                        return {
-                            "success": False,
-                            "error": "Session expired. Please login again."
-                        }
-                    return {
-                        "success": False,
-                        "error": str(e)
-                    }
-                    
+                logger.info("Executing SOSL search: %s", search_term)
+                results = await asyncio.to_thread(sf.search, search_term)
+                return {"success": True, "results": results}
+            except SalesforceExpiredSession:
+                # Session management - handle expired sessions
+                logger.warning("Session expired, clearing session")
+                self.login_handler.clear_session()
+                self._clear_query_cache()
+                return {
+                    "success": False,
+                    "error": "Session expired. Please login again."
+                }
             except Exception as e:
-                logger.error(f"Search failed: {str(e)}")
-                return {"success": False, "error": str(e)}
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
+                
+        except Exception as e:
+            logger.error("Search failed: %s", e)
+            return {"success": False, "error": str(e)}
 
 def run_mcp_server():
     """Run the extension server."""
@@ -176,19 +443,26 @@ def run_mcp_server():
     log_dir = os.path.join(os.path.dirname(__file__), 'logs')
     os.makedirs(log_dir, exist_ok=True)
     
-    # Set up logging to both file and console
+    # Set up logging to both file and console. Records go through an
+    # unbounded queue, and a listener thread feeds the file and stream
+    # handlers, so disk and terminal writes never block a request thread.
     log_file = os.path.join(log_dir, 'mcp_salesforce.log')
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_file)
+    stream_handler = logging.StreamHandler()
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     logging.basicConfig(
-        level=logging.DEBUG,  # Set to DEBUG to capture all levels of logs
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            # File handler - logs everything to a file
-            logging.FileHandler(log_file),
-            # Console handler - also show in terminal
-            logging.StreamHandler()
-        ]
+        # INFO by default; bump to DEBUG via the environment when needed
+        level=os.environ.get('MCP_SF_LOG_LEVEL', 'INFO'),
+        handlers=[logging.handlers.QueueHandler(log_queue)]
     )
-    logger.info(f"Starting MCP Salesforce Extension - Logging to {log_file}")
+    logger.info("Starting MCP Salesforce Extension - Logging to %s", log_file)
     extension = MCPSalesforceExtension()
     extension.run()
 